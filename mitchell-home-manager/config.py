@@ -3,7 +3,18 @@ Mitchell Family Configuration
 All family schedules, activities, and preferences
 """
 
-from datetime import time
+from datetime import date, time, timedelta
+from functools import lru_cache
+from typing import Dict, List, Tuple
+import random
+
+# Day names indexed by date.weekday()
+DAY_NAMES = ('monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday')
+
+
+def day_of(dt: date) -> str:
+    """Get the lowercase day name for a date or datetime."""
+    return DAY_NAMES[dt.weekday()]
 
 # Family Members
 FAMILY = {
@@ -63,6 +74,17 @@ KIDS_SCHEDULE = {
     }
 }
 
+# Briefing line for each kind of daytime location
+LOCATION_FMT = {
+    'school': '📚 {name}: School, home at 4:00 PM',
+    'daycare': '🧸 {name}: Daycare, home at 6:00 PM',
+    'grandmother': "👵 {name}: Grandmother's house",
+    'home': '🏠 {name}: Home',
+}
+
+# (display name, schedule) per kid, resolved once
+KIDS_PRECOMP = [(FAMILY[kid]['name'], info) for kid, info in KIDS_SCHEDULE.items()]
+
 # Weekly Activities
 ACTIVITIES = [
     # Kumon - Reagan & Rory
@@ -81,6 +103,44 @@ ACTIVITIES = [
     {'name': 'Gymnastics', 'kids': ['Owen'], 'day': 'saturday', 'time': time(11, 30), 'duration': 45}
 ]
 
+# Activities indexed by day, sorted by start time (built once at import)
+ACTIVITIES_BY_DAY: Dict[str, List[Dict]] = {}
+for _activity in sorted(ACTIVITIES, key=lambda a: a['time']):
+    ACTIVITIES_BY_DAY.setdefault(_activity['day'], []).append(_activity)
+
+# Column views of ACTIVITIES for numeric filters (same order as ACTIVITIES)
+ACT_DAY = tuple(a['day'] for a in ACTIVITIES)
+ACT_START_MIN = tuple(a['time'].hour * 60 + a['time'].minute for a in ACTIVITIES)
+ACT_END_MIN = tuple(start + a['duration'] for start, a in zip(ACT_START_MIN, ACTIVITIES))
+
+
+@lru_cache(maxsize=None)
+def conflicts_for_day(day: str) -> Tuple[Tuple[Dict, Dict], ...]:
+    """Find pairs of the day's activities whose [start, end) slots overlap."""
+    # Sweep-line: start/end events in time order, ends before starts at the same minute
+    events = []
+    for i, activity_day in enumerate(ACT_DAY):
+        if activity_day == day:
+            events.append((ACT_START_MIN[i], 1, i))
+            events.append((ACT_END_MIN[i], 0, i))
+    events.sort()
+    
+    running = {}
+    conflicts = []
+    for _, is_start, i in events:
+        if is_start:
+            conflicts.extend((other, ACTIVITIES[i]) for other in running.values())
+            running[i] = ACTIVITIES[i]
+        else:
+            del running[i]
+    return tuple(conflicts)
+
+
+# Busy nights: Mon/Wed with an activity before 6 PM (quick dinners only)
+BUSY_NIGHTS = frozenset(
+    day for day, start in zip(ACT_DAY, ACT_START_MIN) if start < 18 * 60
+) & frozenset({'monday', 'wednesday'})
+
 # Recurring Reminders
 RECURRING_REMINDERS = [
     {'name': 'Trash Night', 'day': 'tuesday', 'time': time(19, 0), 'message': '🗑️ Trash goes out tonight!'},
@@ -88,6 +148,11 @@ RECURRING_REMINDERS = [
     {'name': 'Sunday Prep', 'day': 'sunday', 'time': time(19, 0), 'message': '📅 Review the week ahead. Any schedule changes?'},
 ]
 
+# Recurring reminders indexed by day, sorted by time
+RECURRING_BY_DAY: Dict[str, List[Dict]] = {}
+for _reminder in sorted(RECURRING_REMINDERS, key=lambda r: r['time']):
+    RECURRING_BY_DAY.setdefault(_reminder['day'], []).append(_reminder)
+
 # Activity Prep Reminders (minutes before)
 PREP_REMINDERS = {
     'Kumon': {'time_before': 30, 'message': '📚 Kumon in 30 min - grab folders!'},
@@ -96,6 +161,10 @@ PREP_REMINDERS = {
     'Tumbling': {'time_before': 45, 'message': '🤸 Tumbling soon - pack gear!'},
 }
 
+# Lead time of each prep reminder as a timedelta (built once at import)
+for _prep in PREP_REMINDERS.values():
+    _prep['delta'] = timedelta(minutes=_prep['time_before'])
+
 # Meal Planning Database
 MEALS = {
     'quick': [  # For busy nights (Mon/Wed with Kumon at 5pm)
@@ -123,6 +192,24 @@ MEALS = {
     ]
 }
 
+# Each category is walked in a shuffled order so picks rotate without repeats
+_MEAL_ORDER: Dict[str, List[int]] = {cat: list(range(len(meals))) for cat, meals in MEALS.items()}
+for _order in _MEAL_ORDER.values():
+    random.shuffle(_order)
+_MEAL_POS: Dict[str, int] = {cat: 0 for cat in MEALS}
+
+
+def pick_meals(category: str, count: int = 1) -> List[Dict]:
+    """Take the next distinct meals from a category's rotation."""
+    meals = MEALS[category]
+    order = _MEAL_ORDER[category]
+    pos = _MEAL_POS[category]
+    count = min(count, len(meals))
+    
+    picks = [meals[order[(pos + i) % len(order)]] for i in range(count)]
+    _MEAL_POS[category] = (pos + count) % len(order)
+    return picks
+
 # Contact Info for iMessage
 CONTACTS = {
     'ryan': '+14253618792',
@@ -4,11 +4,53 @@ Process plain text commands and implement them
 """
 
 from datetime import datetime, timedelta
+from itertools import islice
 from typing import Optional
 import re
+import sys
 
+from config import ACTIVITIES_BY_DAY, BUSY_NIGHTS, day_of, pick_meals
+from utils import fmt_ampm
 from reminders import SmartReminderSystem
-from morning_briefing import generate_briefing
+from morning_briefing import iter_briefing_lines
+
+# Command keyword patterns
+_BRIEFING_RE = re.compile(r"briefing|schedule today|what's today")
+_TOMORROW_RE = re.compile(r'tomorrow|next day')
+_REMINDER_RE = re.compile(r'remind me|remind us|set reminder')
+_DINNER_RE = re.compile(r'dinner|meal|what to cook|eat tonight')
+_ACTIVITIES_RE = re.compile(r'activities|busy tonight|schedule')
+_HELP_RE = re.compile(r'help|what can you do|commands')
+
+# Command routes in priority order: (pattern, handler name, handler takes text)
+_ROUTES = (
+    (_BRIEFING_RE, '_get_briefing', False),
+    (_TOMORROW_RE, '_get_tomorrow', False),
+    (_REMINDER_RE, '_parse_reminder', True),
+    (_DINNER_RE, '_suggest_dinner', False),
+    (_ACTIVITIES_RE, '_get_activities', False),
+    (_HELP_RE, '_get_help', False),
+)
+
+# Reminder message patterns
+_REMIND_PATTERNS = (
+    re.compile(r'remind (?:me|us) (?:to )?(.+?)(?: at| on| every|$)'),
+    re.compile(r'set reminder (?:to )?(.+?)(?: at| on| every|$)'),
+)
+
+# Reminder time patterns
+_TIME_PATTERNS = (
+    (re.compile(r'at (\d+):(\d+)\s*(am|pm)?'), 'specific'),
+    (re.compile(r'at (\d+)\s*(am|pm)'), 'hour'),
+    (re.compile(r'(\d+)\s*(am|pm)'), 'hour'),
+)
+
+# Relative reminder time patterns
+_IN_AN_HOUR_RE = re.compile(r'in an hour|in 1 hour')
+_IN_HALF_HOUR_RE = re.compile(r'in 30 minutes|in half an hour')
+
+# Words that end an interactive session
+_EXIT_WORDS = frozenset({'exit', 'quit', 'bye'})
 
 
 class HomeManager:
@@ -21,53 +63,33 @@ class HomeManager:
         """Process a natural language command and return response."""
         text = text.lower().strip()
         
-        # Briefing commands
-        if any(word in text for word in ['briefing', 'schedule today', 'what\'s today']):
-            return self._get_briefing()
-        
-        if any(word in text for word in ['tomorrow', 'next day']):
-            return self._get_tomorrow()
-        
-        # Reminder commands
-        if any(phrase in text for phrase in ['remind me', 'remind us', 'set reminder']):
-            return self._parse_reminder(text)
-        
-        # Dinner commands
-        if any(word in text for word in ['dinner', 'meal', 'what to cook', 'eat tonight']):
-            return self._suggest_dinner()
-        
-        # Activity queries
-        if any(word in text for word in ['activities', 'busy tonight', 'schedule']):
-            return self._get_activities()
-        
-        # Help
-        if any(word in text for word in ['help', 'what can you do', 'commands']):
-            return self._get_help()
+        # First matching route wins, so order encodes priority
+        for pattern, method, takes_text in _ROUTES:
+            if pattern.search(text):
+                handler = getattr(self, method)
+                return handler(text) if takes_text else handler()
         
         # Default
         return "I'm not sure what you're asking. Try: 'briefing', 'remind me to...', 'dinner ideas', or 'help'"
     
     def _get_briefing(self) -> str:
         """Generate and return today's briefing."""
-        briefing = generate_briefing()
         # Return summary since full briefing is long
-        lines = briefing.split('\n')[:15]
+        lines = islice(iter_briefing_lines(), 15)
         return '\n'.join(lines) + '\n\n(Reply "full briefing" for complete version)'
     
     def _get_tomorrow(self) -> str:
         """Get tomorrow's schedule."""
         tomorrow = datetime.now() + timedelta(days=1)
-        from config import get_day_name, get_activities
-        
-        day = tomorrow.strftime('%A').lower()
-        activities = get_activities(day)
+        day = day_of(tomorrow)
+        activities = ACTIVITIES_BY_DAY.get(day, [])
         
         lines = [f"📅 TOMORROW ({tomorrow.strftime('%A, %B %d')}):\n"]
         
         if activities:
             lines.append("Activities:")
             for a in activities:
-                time_str = a['time'].strftime('%I:%M %p').lstrip('0')
+                time_str = fmt_ampm(a['time'])
                 kids = ', '.join(a['kids'])
                 lines.append(f"  • {kids}: {a['name']} at {time_str}")
         else:
@@ -78,14 +100,9 @@ class HomeManager:
     def _parse_reminder(self, text: str) -> str:
         """Parse reminder command and set reminder."""
         # Extract reminder message
-        patterns = [
-            r'remind (?:me|us) (?:to )?(.+?)(?: at| on| every|$)',
-            r'set reminder (?:to )?(.+?)(?: at| on| every|$)',
-        ]
-        
         message = None
-        for pattern in patterns:
-            match = re.search(pattern, text)
+        for pattern in _REMIND_PATTERNS:
+            match = pattern.search(text)
             if match:
                 message = match.group(1).strip()
                 break
@@ -113,14 +130,8 @@ class HomeManager:
         now = datetime.now()
         
         # Check for specific times
-        time_patterns = [
-            (r'at (\d+):(\d+)\s*(am|pm)?', 'specific'),
-            (r'at (\d+)\s*(am|pm)', 'hour'),
-            (r'(\d+)\s*(am|pm)', 'hour'),
-        ]
-        
-        for pattern, pattern_type in time_patterns:
-            match = re.search(pattern, text)
+        for pattern, pattern_type in _TIME_PATTERNS:
+            match = pattern.search(text)
             if match:
                 if pattern_type == 'specific':
                     hour = int(match.group(1))
@@ -149,9 +160,9 @@ class HomeManager:
                 return when
         
         # Check for relative times
-        if 'in an hour' in text or 'in 1 hour' in text:
+        if _IN_AN_HOUR_RE.search(text):
             return now + timedelta(hours=1)
-        if 'in 30 minutes' in text or 'in half an hour' in text:
+        if _IN_HALF_HOUR_RE.search(text):
             return now + timedelta(minutes=30)
         if 'tonight' in text:
             return now.replace(hour=19, minute=0)
@@ -160,24 +171,15 @@ class HomeManager:
     
     def _suggest_dinner(self) -> str:
         """Suggest dinner ideas."""
-        from config import MEALS
-        import random
-        
         now = datetime.now()
-        day = now.strftime('%A').lower()
+        day = day_of(now)
         
         # Determine meal type based on schedule
-        from config import ACTIVITIES
-        activities_today = [a for a in ACTIVITIES if a['day'] == day]
-        busy_night = day in ['monday', 'wednesday'] and any(
-            a['time'].hour < 18 for a in activities_today
-        )
-        
-        if busy_night:
-            suggestions = random.sample(MEALS['quick'], min(3, len(MEALS['quick'])))
+        if day in BUSY_NIGHTS:
+            suggestions = pick_meals('quick', 3)
             lines = ["🍽️ QUICK DINNER IDEAS (busy night!):\n"]
         else:
-            suggestions = random.sample(MEALS['normal'], min(3, len(MEALS['normal'])))
+            suggestions = pick_meals('normal', 3)
             lines = ["🍽️ DINNER SUGGESTIONS:\n"]
         
         for i, meal in enumerate(suggestions, 1):
@@ -188,18 +190,16 @@ class HomeManager:
     
     def _get_activities(self) -> str:
         """Get today's activities."""
-        day = datetime.now().strftime('%A').lower()
-        from config import ACTIVITIES
-        
-        activities = [a for a in ACTIVITIES if a['day'] == day]
+        day = day_of(datetime.now())
+        activities = ACTIVITIES_BY_DAY.get(day, [])
         
         if not activities:
             return "🎯 No activities scheduled today!"
         
         lines = [f"🎯 TODAY'S ACTIVITIES ({len(activities)}):\n"]
         
-        for a in sorted(activities, key=lambda x: x['time']):
-            time_str = a['time'].strftime('%I:%M %p').lstrip('0')
+        for a in activities:
+            time_str = fmt_ampm(a['time'])
             kids = ', '.join(a['kids'])
             lines.append(f"  {time_str}: {a['name']} ({kids})")
         
@@ -227,15 +227,19 @@ I'll learn your preferences over time and get smarter about suggestions!
 """
 
 
+# Shared manager so reminder state survives across messages
+_MANAGER: Optional[HomeManager] = None
+
+
 def handle_message(text: str) -> str:
     """Main entry point - process a message and return response."""
-    manager = HomeManager()
-    return manager.process_command(text)
+    global _MANAGER
+    if _MANAGER is None:
+        _MANAGER = HomeManager()
+    return _MANAGER.process_command(text)
 
 
 if __name__ == "__main__":
-    import sys
-    
     if len(sys.argv) > 1:
         command = ' '.join(sys.argv[1:])
         print(f"👤 You: {command}")
@@ -248,7 +252,7 @@ if __name__ == "__main__":
         while True:
             try:
                 user_input = input("You: ")
-                if user_input.lower() in ['exit', 'quit', 'bye']:
+                if user_input.lower() in _EXIT_WORDS:
                     break
                 response = handle_message(user_input)
                 print(f"\n🤖 {response}\n")
@@ -3,21 +3,39 @@ Daily Morning Briefing Generator
 Creates and sends a personalized family briefing each morning
 """
 
-from datetime import datetime, timedelta
-from typing import List, Dict
-import random
+from datetime import date, datetime, timedelta
+from typing import Iterator, List, Dict
+import sys
+import time
 
 from config import (
-    FAMILY, FAITH_SCHEDULE, KIDS_SCHEDULE, ACTIVITIES,
-    RECURRING_REMINDERS, DAILY_ROUTINE, MEALS
+    FAITH_SCHEDULE, KIDS_PRECOMP, LOCATION_FMT, ACTIVITIES_BY_DAY,
+    RECURRING_BY_DAY, BUSY_NIGHTS, CONTACTS, DAY_NAMES, day_of, pick_meals
 )
+from utils import fmt_ampm
+
+# Seconds a cached briefing stays fresh
+BRIEFING_CACHE_TTL = 3600
+
+# Deterministic briefing sections, keyed by date: [built_at, head, tail or None]
+_BRIEFING_CACHE: Dict[date, List] = {}
+
+# Static briefing text
+_HEADER_FMT = "🏠 Good morning! Here's your {day_display} briefing:\n\n═══ TODAY'S SCHEDULE ═══\n\n"
+_NO_ACTIVITIES_BLOCK = "🎯 No activities today - enjoy the break!\n\n"
+_NOTE_BLOCK = (
+    "═══ NOTE ═══\n"
+    "💕 Remember: Quality time with Faith matters. Even 15 minutes of focused conversation after bedtime routines makes a difference.\n"
+    "\n"
+)
+_SIGN_OFF = "Have a great day! 🌟"
 
 
 def get_day_name(date: datetime = None) -> str:
     """Get lowercase day name."""
     if date is None:
         date = datetime.now()
-    return date.strftime('%A').lower()
+    return day_of(date)
 
 
 def get_faith_status(day: str) -> str:
@@ -33,30 +51,21 @@ def get_faith_status(day: str) -> str:
 
 def get_kids_schedule(day: str) -> List[str]:
     """Get where each kid is today."""
-    lines = []
-    for kid, info in KIDS_SCHEDULE.items():
-        location = info.get(day, 'home')
-        name = FAMILY[kid]['name']
-        if location == 'school':
-            lines.append(f"📚 {name}: School, home at 4:00 PM")
-        elif location == 'daycare':
-            lines.append(f"🧸 {name}: Daycare, home at 6:00 PM")
-        elif location == 'grandmother':
-            lines.append(f"👵 {name}: Grandmother's house")
-        else:
-            lines.append(f"🏠 {name}: Home")
-    return lines
+    return [
+        LOCATION_FMT.get(info.get(day, 'home'), LOCATION_FMT['home']).format(name=name)
+        for name, info in KIDS_PRECOMP
+    ]
 
 
 def get_activities(day: str) -> List[Dict]:
-    """Get all activities for the day."""
-    return [a for a in ACTIVITIES if a['day'] == day]
+    """Get all activities for the day, sorted by time."""
+    return ACTIVITIES_BY_DAY.get(day, [])
 
 
 def format_activity(activity: Dict) -> str:
     """Format an activity for display."""
     kids = ', '.join(activity['kids'])
-    time_str = activity['time'].strftime('%I:%M %p').lstrip('0')
+    time_str = fmt_ampm(activity['time'])
     return f"  • {kids}: {activity['name']} at {time_str}"
 
 
@@ -71,29 +80,26 @@ def get_busy_night_rating(activities: List[Dict]) -> str:
         return "🔥 Busy night! Multiple activities"
 
 
-def suggest_dinner(day: str, activities: List[Dict]) -> Dict:
+def suggest_dinner(day: str) -> Dict:
     """Suggest a dinner based on schedule."""
-    # Check if it's a busy night (Mon/Wed with early activities)
-    busy_night = day in ['monday', 'wednesday'] and any(
-        a['time'].hour < 18 for a in activities
-    )
-    
-    if busy_night:
-        meal = random.choice(MEALS['quick'])
+    if day in BUSY_NIGHTS:
+        meal = pick_meals('quick')[0]
         notes = f"Quick meal tonight - {meal['name']} ({meal['prep_time']} min)"
     elif day in ['saturday', 'sunday']:
-        meal = random.choice(MEALS['weekend'])
+        meal = pick_meals('weekend')[0]
         notes = f"Weekend meal idea: {meal['name']}"
     else:
-        meal = random.choice(MEALS['normal'])
+        meal = pick_meals('normal')[0]
         notes = f"Tonight: {meal['name']} ({meal['prep_time']} min)"
     
     return {'name': meal['name'], 'notes': notes, 'prep': meal.get('notes', '')}
 
 
-def get_tomorrow_preview() -> str:
-    """Get a quick preview of tomorrow."""
-    tomorrow = datetime.now() + timedelta(days=1)
+def get_tomorrow_preview(date: datetime = None) -> str:
+    """Get a quick preview of the day after the given date."""
+    if date is None:
+        date = datetime.now()
+    tomorrow = date + timedelta(days=1)
     day_name = get_day_name(tomorrow)
     activities = get_activities(day_name)
     
@@ -104,74 +110,89 @@ def get_tomorrow_preview() -> str:
         return "Tomorrow: No scheduled activities"
 
 
-def generate_briefing(date: datetime = None) -> str:
-    """Generate the full morning briefing."""
-    if date is None:
-        date = datetime.now()
-    
+def invalidate_briefing_cache() -> None:
+    """Drop all cached briefing sections."""
+    _BRIEFING_CACHE.clear()
+
+
+def _build_briefing_head(date: datetime) -> str:
+    """Build the schedule-driven text that comes before the dinner section."""
     day_name = get_day_name(date)
-    day_display = date.strftime('%A, %B %d')
-    
-    # Header
-    lines = [
-        f"🏠 Good morning! Here's your {day_display} briefing:",
-        "",
-        "═══ TODAY'S SCHEDULE ═══",
-        "",
-    ]
     
-    # Faith's schedule
-    lines.append(get_faith_status(day_name))
-    lines.append("")
+    # Header and Faith's schedule
+    header = _HEADER_FMT.format(day_display=date.strftime('%A, %B %d'))
+    faith_block = f"{get_faith_status(day_name)}\n\n"
     
     # Kids schedule
-    lines.append("👶 Kids:")
-    for kid_line in get_kids_schedule(day_name):
-        lines.append(f"  {kid_line}")
-    lines.append("")
+    kids_block = "".join(
+        ["👶 Kids:\n"] + [f"  {kid_line}\n" for kid_line in get_kids_schedule(day_name)] + ["\n"]
+    )
     
     # Activities
     activities = get_activities(day_name)
     if activities:
-        lines.append("🎯 ACTIVITIES TODAY:")
-        lines.append(get_busy_night_rating(activities))
-        for activity in activities:
-            lines.append(format_activity(activity))
-        lines.append("")
+        activities_block = "".join(
+            ["🎯 ACTIVITIES TODAY:\n", f"{get_busy_night_rating(activities)}\n"]
+            + [f"{format_activity(activity)}\n" for activity in activities]
+            + ["\n"]
+        )
     else:
-        lines.append("🎯 No activities today - enjoy the break!")
-        lines.append("")
-    
-    # Dinner suggestion
-    dinner = suggest_dinner(day_name, activities)
-    lines.append("🍽️ DINNER:")
-    lines.append(f"  {dinner['notes']}")
-    if dinner['prep']:
-        lines.append(f"  💡 {dinner['prep']}")
-    lines.append("")
+        activities_block = _NO_ACTIVITIES_BLOCK
     
+    return "".join([header, faith_block, kids_block, activities_block])
+
+
+def _build_briefing_tail(date: datetime) -> str:
+    """Build the schedule-driven text that comes after the dinner section."""
     # Reminders
-    reminders = [r for r in RECURRING_REMINDERS if r['day'] == day_name]
+    reminders = RECURRING_BY_DAY.get(get_day_name(date), [])
     if reminders:
-        lines.append("⏰ REMINDERS:")
-        for r in reminders:
-            lines.append(f"  {r['message']}")
-        lines.append("")
+        reminders_block = "".join(
+            ["⏰ REMINDERS:\n"] + [f"  {r['message']}\n" for r in reminders] + ["\n"]
+        )
+    else:
+        reminders_block = ""
     
     # Tomorrow preview
-    lines.append("═══ COMING UP ═══")
-    lines.append(get_tomorrow_preview())
-    lines.append("")
+    coming_up = f"═══ COMING UP ═══\n{get_tomorrow_preview(date)}\n\n"
     
-    # Motivational/personal note
-    lines.append("═══ NOTE ═══")
-    lines.append("💕 Remember: Quality time with Faith matters. Even 15 minutes of focused conversation after bedtime routines makes a difference.")
-    lines.append("")
+    return "".join([reminders_block, coming_up, _NOTE_BLOCK, _SIGN_OFF])
+
+
+def _iter_briefing_blocks(date: datetime = None) -> Iterator[str]:
+    """Yield the briefing as text blocks, building each only when reached."""
+    if date is None:
+        date = datetime.now()
     
-    # Sign off
-    lines.append("Have a great day! 🌟")
+    # Everything but the dinner pick is fixed for the day, so reuse it
+    key = date.date()
+    entry = _BRIEFING_CACHE.get(key)
+    if not entry or time.time() - entry[0] >= BRIEFING_CACHE_TTL:
+        # Only one day's briefing is useful, so don't let past days pile up
+        _BRIEFING_CACHE.clear()
+        entry = _BRIEFING_CACHE[key] = [time.time(), _build_briefing_head(date), None]
+    yield entry[1]
     
-    return '\n'.join(lines)
+    # Dinner suggestion
+    dinner = suggest_dinner(get_day_name(date))
+    prep_line = f"  💡 {dinner['prep']}\n" if dinner['prep'] else ""
+    yield f"🍽️ DINNER:\n  {dinner['notes']}\n{prep_line}\n"
+    
+    # The tail is only built once a caller reads past dinner
+    if entry[2] is None:
+        entry[2] = _build_briefing_tail(date)
+    yield entry[2]
+
+
+def iter_briefing_lines(date: datetime = None) -> Iterator[str]:
+    """Yield the briefing line by line, so callers can stop early."""
+    for block in _iter_briefing_blocks(date):
+        yield from block.splitlines()
+
+
+def generate_briefing(date: datetime = None) -> str:
+    """Generate the full morning briefing."""
+    return "".join(_iter_briefing_blocks(date))
 
 
 def send_briefing():
@@ -188,16 +209,13 @@ def send_briefing():
 
 
 if __name__ == "__main__":
-    import sys
-    
     # Allow testing different days
     if len(sys.argv) > 1:
         test_day = sys.argv[1].lower()
         # Map day names to next occurrence
-        days = ['monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday']
-        if test_day in days:
+        if test_day in DAY_NAMES:
             today_idx = datetime.now().weekday()
-            test_idx = days.index(test_day)
+            test_idx = DAY_NAMES.index(test_day)
             days_ahead = (test_idx - today_idx) % 7
             test_date = datetime.now() + timedelta(days=days_ahead)
             print(f"\n🧪 TEST MODE: Showing briefing for {test_day.upper()}\n")
@@ -3,14 +3,56 @@ Smart Reminder System
 Proactive alerts for the Mitchell family
 """
 
-from datetime import datetime, timedelta, time
-from typing import List, Dict, Optional
+from datetime import date, datetime, timedelta
+from itertools import chain
+import heapq
+from operator import itemgetter
+from typing import Iterator, List, Dict, Optional, Set, Tuple
 import json
+import os
+import sys
 
 from config import (
-    ACTIVITIES, RECURRING_REMINDERS, PREP_REMINDERS,
-    CONTACTS, DAILY_ROUTINE
+    ACTIVITIES_BY_DAY, RECURRING_BY_DAY, PREP_REMINDERS, DAILY_ROUTINE, day_of
 )
+from utils import fmt_ampm
+
+# One-time reminders, stored as one JSON record per line (times as Unix timestamps)
+CUSTOM_REMINDERS_FILE = 'custom_reminders.jsonl'
+
+# Earlier single-document store (ISO times), imported once into the file above
+LEGACY_REMINDERS_FILE = 'custom_reminders.json'
+
+# How long before bedtime to start the wind-down routine
+BEDTIME_PREP = timedelta(minutes=30)
+
+# Reminders are sent when they are this close to their time
+DUE_WINDOW = timedelta(minutes=5)
+
+
+def migrate_legacy_reminders() -> None:
+    """Append reminders from the old JSON store to the JSON-lines file, once."""
+    if not os.path.exists(LEGACY_REMINDERS_FILE):
+        return
+    
+    try:
+        with open(LEGACY_REMINDERS_FILE, 'r') as f:
+            legacy = json.load(f)
+        lines = [
+            json.dumps({
+                'message': r['message'],
+                'time': int(datetime.fromisoformat(r['time']).timestamp()),
+                'created': int(datetime.fromisoformat(r.get('created', r['time'])).timestamp())
+            }) + '\n'
+            for r in legacy
+        ]
+    except (ValueError, KeyError, TypeError) as e:
+        print(f"⚠️  Could not import {LEGACY_REMINDERS_FILE}, leaving it in place: {e}")
+        return
+    
+    with open(CUSTOM_REMINDERS_FILE, 'a') as f:
+        f.writelines(lines)
+    os.replace(LEGACY_REMINDERS_FILE, LEGACY_REMINDERS_FILE + '.migrated')
 
 
 class SmartReminderSystem:
@@ -18,150 +60,204 @@ class SmartReminderSystem:
     
     def __init__(self):
         self.reminders = []
-        self.sent_reminders = set()  # Track what we've already sent today
+        self.sent_reminders: Set[Tuple[datetime, str]] = set()  # Track what we've already sent today
+        self._custom_cache: List[Dict] = []
+        self._custom_stamp: Optional[Tuple[int, int]] = None  # (mtime_ns, size)
+        self._pending: List[Tuple[datetime, int, Dict]] = []  # heap of (time, seq, reminder)
+        self._pending_key: Optional[Tuple[date, Optional[Tuple[int, int]]]] = None
+        migrate_legacy_reminders()
     
     def get_today_activities(self) -> List[Dict]:
         """Get all activities for today."""
-        day = datetime.now().strftime('%A').lower()
-        return [a for a in ACTIVITIES if a['day'] == day]
+        day = day_of(datetime.now())
+        return ACTIVITIES_BY_DAY.get(day, [])
     
-    def get_activity_prep_reminders(self) -> List[Dict]:
-        """Generate prep reminders for today's activities."""
-        reminders = []
-        activities = self.get_today_activities()
+    def _context(self, cutoff: Optional[datetime] = None) -> Tuple[datetime, date, str, datetime]:
+        """Snapshot (now, today, day name, cutoff) shared by the reminder scans."""
         now = datetime.now()
-        
-        for activity in activities:
-            activity_name = activity['name']
-            activity_time = datetime.combine(now.date(), activity['time'])
+        return now, now.date(), day_of(now), cutoff or datetime.max
+    
+    def _iter_activity_prep(self, now: datetime, today: date, day: str,
+                            cutoff: datetime) -> Iterator[Dict]:
+        """Yield prep reminders for today's activities due by the cutoff."""
+        for activity in ACTIVITIES_BY_DAY.get(day, []):
+            # Only activities with a prep reminder
+            prep = PREP_REMINDERS.get(activity['name'])
+            if prep is None:
+                continue
             
-            # Check if this activity has a prep reminder
-            if activity_name in PREP_REMINDERS:
-                prep = PREP_REMINDERS[activity_name]
-                reminder_time = activity_time - timedelta(minutes=prep['time_before'])
-                
-                # Only add if reminder time is in the future
-                if reminder_time > now:
-                    reminders.append({
-                        'time': reminder_time,
-                        'message': f"⏰ {prep['message']} ({activity['kids']})",
-                        'type': 'activity_prep'
-                    })
-        
-        return reminders
+            activity_time = datetime.combine(today, activity['time'])
+            reminder_time = activity_time - prep['delta']
+            
+            # Only add if reminder time is in the future
+            if now < reminder_time <= cutoff:
+                yield {
+                    'time': reminder_time,
+                    'message': f"⏰ {prep['message']} ({activity['kids']})",
+                    'type': 'activity_prep'
+                }
     
-    def get_recurring_reminders(self) -> List[Dict]:
-        """Get standard recurring reminders for today."""
-        day = datetime.now().strftime('%A').lower()
-        now = datetime.now()
-        reminders = []
-        
-        for r in RECURRING_REMINDERS:
-            if r['day'] == day:
-                reminder_time = datetime.combine(now.date(), r['time'])
-                if reminder_time > now:
-                    reminders.append({
-                        'time': reminder_time,
-                        'message': r['message'],
-                        'type': 'recurring'
-                    })
-        
-        return reminders
+    def _iter_recurring(self, now: datetime, today: date, day: str,
+                        cutoff: datetime) -> Iterator[Dict]:
+        """Yield today's recurring reminders due by the cutoff."""
+        for r in RECURRING_BY_DAY.get(day, []):
+            reminder_time = datetime.combine(today, r['time'])
+            if now < reminder_time <= cutoff:
+                yield {
+                    'time': reminder_time,
+                    'message': r['message'],
+                    'type': 'recurring'
+                }
     
-    def get_bedtime_reminders(self) -> List[Dict]:
-        """Reminders for bedtime routines."""
-        now = datetime.now()
-        reminders = []
-        
+    def _iter_bedtime(self, now: datetime, today: date, day: str,
+                      cutoff: datetime) -> Iterator[Dict]:
+        """Yield bedtime routine reminders due by the cutoff."""
         # Owen's bedtime prep (30 min before)
-        owen_bedtime = datetime.combine(now.date(), DAILY_ROUTINE['bedtime']['owen'])
-        owen_prep = owen_bedtime - timedelta(minutes=30)
+        owen_bedtime = datetime.combine(today, DAILY_ROUTINE['bedtime']['owen'])
+        owen_prep = owen_bedtime - BEDTIME_PREP
         
-        if owen_prep > now and owen_prep.date() == now.date():
-            reminders.append({
+        if now < owen_prep <= cutoff and owen_prep.date() == today:
+            yield {
                 'time': owen_prep,
                 'message': '🌙 Owen bedtime in 30 min - start wind-down routine',
                 'type': 'bedtime'
-            })
+            }
         
         # Older kids bedtime prep (30 min before)
-        older_bedtime = datetime.combine(now.date(), DAILY_ROUTINE['bedtime']['older_kids'])
-        older_prep = older_bedtime - timedelta(minutes=30)
+        older_bedtime = datetime.combine(today, DAILY_ROUTINE['bedtime']['older_kids'])
+        older_prep = older_bedtime - BEDTIME_PREP
         
-        if older_prep > now and older_prep.date() == now.date():
-            reminders.append({
+        if now < older_prep <= cutoff and older_prep.date() == today:
+            yield {
                 'time': older_prep,
                 'message': '🌙 Reagan & Rory bedtime in 30 min - start routines',
                 'type': 'bedtime'
-            })
-        
-        return reminders
+            }
     
-    def check_custom_reminders(self) -> List[Dict]:
-        """Check for user-defined custom reminders."""
-        # Load from file if exists
-        try:
-            with open('custom_reminders.json', 'r') as f:
-                custom = json.load(f)
-        except FileNotFoundError:
-            return []
-        
-        now = datetime.now()
-        reminders = []
-        
-        for r in custom:
-            reminder_time = datetime.fromisoformat(r['time'])
-            if reminder_time > now and reminder_time.date() == now.date():
-                reminders.append({
+    def _iter_custom(self, now: datetime, today: date, day: str,
+                     cutoff: datetime) -> Iterator[Dict]:
+        """Yield today's custom reminders due by the cutoff."""
+        for r in self._load_custom_reminders():
+            reminder_time = r['time']
+            if now < reminder_time <= cutoff and reminder_time.date() == today:
+                yield {
                     'time': reminder_time,
                     'message': r['message'],
                     'type': 'custom'
-                })
+                }
+    
+    def get_activity_prep_reminders(self) -> List[Dict]:
+        """Generate prep reminders for today's activities."""
+        return list(self._iter_activity_prep(*self._context()))
+    
+    def get_recurring_reminders(self) -> List[Dict]:
+        """Get standard recurring reminders for today."""
+        return list(self._iter_recurring(*self._context()))
+    
+    def get_bedtime_reminders(self) -> List[Dict]:
+        """Reminders for bedtime routines."""
+        return list(self._iter_bedtime(*self._context()))
+    
+    def _load_custom_reminders(self) -> List[Dict]:
+        """Load custom reminders, re-reading the file only when it changes."""
+        try:
+            stat = os.stat(CUSTOM_REMINDERS_FILE)
+        except FileNotFoundError:
+            # Forget the old contents so the pending heap sees the change
+            self._custom_cache = []
+            self._custom_stamp = None
+            return self._custom_cache
         
-        return reminders
+        stamp = (stat.st_mtime_ns, stat.st_size)
+        if stamp != self._custom_stamp:
+            custom = []
+            with open(CUSTOM_REMINDERS_FILE, 'r') as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    r = json.loads(line)
+                    custom.append({
+                        'message': r['message'],
+                        'time': datetime.fromtimestamp(r['time'])
+                    })
+            self._custom_cache = custom
+            self._custom_stamp = stamp
+        
+        return self._custom_cache
+    
+    def check_custom_reminders(self) -> List[Dict]:
+        """Check for user-defined custom reminders."""
+        return list(self._iter_custom(*self._context()))
+    
+    def _iter_all(self, now: datetime, today: date, day: str,
+                  cutoff: datetime) -> Iterator[Dict]:
+        """Yield reminders from every source due by the cutoff."""
+        ctx = (now, today, day, cutoff)
+        return chain(
+            self._iter_activity_prep(*ctx),
+            self._iter_recurring(*ctx),
+            self._iter_bedtime(*ctx),
+            self._iter_custom(*ctx),
+        )
     
     def get_upcoming_reminders(self, hours_ahead: int = 12) -> List[Dict]:
         """Get all reminders for the next X hours."""
-        now = datetime.now()
+        now, today, day, _ = self._context()
         cutoff = now + timedelta(hours=hours_ahead)
         
-        all_reminders = (
-            self.get_activity_prep_reminders() +
-            self.get_recurring_reminders() +
-            self.get_bedtime_reminders() +
-            self.check_custom_reminders()
-        )
+        # Single pass over every source, filtered to the window and sorted by time
+        return sorted(self._iter_all(now, today, day, cutoff), key=itemgetter('time'))
+    
+    def _refresh_pending(self, now: datetime) -> None:
+        """Rebuild the pending heap on a new day or when custom reminders change."""
+        self._load_custom_reminders()
+        key = (now.date(), self._custom_stamp)
+        if key == self._pending_key:
+            return
         
-        # Filter to upcoming only and sort by time
-        upcoming = [r for r in all_reminders if r['time'] <= cutoff]
-        upcoming.sort(key=lambda x: x['time'])
+        if self._pending_key is None or self._pending_key[0] != key[0]:
+            self.sent_reminders.clear()
         
-        return upcoming
+        day = day_of(now)
+        reminders = self._iter_all(now, key[0], day, datetime.max)
+        self._pending = [(r['time'], i, r) for i, r in enumerate(reminders)]
+        heapq.heapify(self._pending)
+        self._pending_key = key
     
     def format_reminder(self, reminder: Dict) -> str:
         """Format a reminder for display."""
-        time_str = reminder['time'].strftime('%I:%M %p').lstrip('0')
+        time_str = fmt_ampm(reminder['time'])
         return f"{time_str}: {reminder['message']}"
     
     def send_due_reminders(self):
         """Check and send any reminders that are due now."""
         now = datetime.now()
-        upcoming = self.get_upcoming_reminders(hours_ahead=1)
+        self._refresh_pending(now)
+        due_by = now + DUE_WINDOW
+        stale_before = now - DUE_WINDOW
         
+        # Pop only what falls inside the due window; the rest stays queued
         sent = []
-        for reminder in upcoming:
-            # Send if within 5 minutes of reminder time
-            time_diff = abs((reminder['time'] - now).total_seconds())
-            if time_diff < 300:  # 5 minutes
-                reminder_id = f"{reminder['time'].isoformat()}_{reminder['message'][:20]}"
-                
-                if reminder_id not in self.sent_reminders:
-                    self.sent_reminders.add(reminder_id)
-                    self._send_message(reminder['message'])
-                    sent.append(reminder)
+        while self._pending and self._pending[0][0] < due_by:
+            reminder_time, _, reminder = heapq.heappop(self._pending)
+            if reminder_time <= stale_before:
+                continue  # Missed by more than the window - drop it
+            
+            reminder_id = (reminder_time, reminder['message'])
+            if reminder_id not in self.sent_reminders:
+                self.sent_reminders.add(reminder_id)
+                sent.append(reminder)
+        
+        # Everything due in this window goes out as one notification
+        if sent:
+            self._send_batch([r['message'] for r in sent])
         
         return sent
     
+    def _send_batch(self, messages: List[str]):
+        """Send several reminders as a single combined message."""
+        self._send_message('\n'.join(messages))
+    
     def _send_message(self, message: str):
         """Send message via iMessage."""
         # For now, just print - integrate with iMessage later
@@ -171,22 +267,17 @@ class SmartReminderSystem:
     
     def add_custom_reminder(self, message: str, when: datetime):
         """Add a one-time custom reminder."""
-        try:
-            with open('custom_reminders.json', 'r') as f:
-                custom = json.load(f)
-        except FileNotFoundError:
-            custom = []
-        
-        custom.append({
+        record = {
             'message': message,
-            'time': when.isoformat(),
-            'created': datetime.now().isoformat()
-        })
+            'time': int(when.timestamp()),
+            'created': int(datetime.now().timestamp())
+        }
         
-        with open('custom_reminders.json', 'w') as f:
-            json.dump(custom, f, indent=2)
+        # Append-only, so adding never rewrites existing reminders
+        with open(CUSTOM_REMINDERS_FILE, 'a') as f:
+            f.write(json.dumps(record) + '\n')
         
-        return f"✅ Reminder set for {when.strftime('%I:%M %p').lstrip('0')}: {message}"
+        return f"✅ Reminder set for {fmt_ampm(when)}: {message}"
 
 
 def show_todays_reminders():
@@ -218,8 +309,6 @@ def check_and_send():
 
 
 if __name__ == "__main__":
-    import sys
-    
     if len(sys.argv) > 1 and sys.argv[1] == 'check':
         check_and_send()
     else:
@@ -0,0 +1,13 @@
+"""
+Shared Helpers
+Small formatting utilities used across the home manager
+"""
+
+from datetime import datetime, time
+from typing import Union
+
+
+def fmt_ampm(t: Union[datetime, time]) -> str:
+    """Format a time as '5:00 PM' (12-hour clock, no leading zero)."""
+    hour = t.hour % 12 or 12
+    return f"{hour}:{t.minute:02d} {'AM' if t.hour < 12 else 'PM'}"
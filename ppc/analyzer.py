@@ -4,10 +4,10 @@ Analyzes Amazon Advertising campaign performance and generates optimization reco
 """
 
 import csv
-import json
-from datetime import datetime, timedelta
+from datetime import datetime
+from operator import itemgetter
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
 
 # Configuration
 TARGET_ACOS = 0.30  # 30% target ACOS (Advertising Cost of Sale)
@@ -17,31 +17,74 @@ BID_ADJUSTMENT_UP = 0.10  # 10% increase
 BID_ADJUSTMENT_DOWN = 0.15  # 15% decrease
 PAUSE_THRESHOLD_ACOS = 0.50  # Flag if ACOS > 50%
 
+# Priorities are ranked ints internally (lower sorts first); labels are for output
+HIGH, MEDIUM, LOW = range(3)
+PRIORITY_LABELS = ('HIGH', 'MEDIUM', 'LOW')
+
+# Derived decision thresholds and fixed reason text, folded once at import
+STRONG_ACOS = TARGET_ACOS * 0.6  # Exceptional performance (40% below target)
+GOOD_ACOS = TARGET_ACOS * 0.85  # Good performance (15% below target)
+LOW_CTR = 0.2  # CTR (in %) below which creatives need review
+_URGENT_SUFFIX = f' is very high (target: {TARGET_ACOS:.1%}). Consider pausing or aggressive bid reduction.'
+_REDUCE_SUFFIX = f' above target {TARGET_ACOS:.1%}. Reduce bids by ~{BID_ADJUSTMENT_DOWN:.0%}.'
+_STRONG_SUFFIX = f'! Increase bids by {BID_ADJUSTMENT_UP:.0%} to scale.'
+
+# Amazon column names for each field we read, in order of preference
+COLUMN_ALIASES = {
+    'name': ['Campaign name', 'Campaign Name', 'Campaign'],
+    'spend': ['Total cost', 'Spend', 'Cost', 'Total Cost'],
+    'sales': ['Sales', 'Sales (promoted)', 'Total Sales'],
+    'clicks': ['Clicks', 'Gross clicks', 'Total Clicks'],
+    'impressions': ['Impressions', 'Total Impressions'],
+    'roas': ['ROAS', 'ROAS (promoted)'],
+}
+
+# Report cell formatters, bound once and mapped over whole columns
+_fmt_money = '${:.2f}'.format
+_fmt_acos = '{:.1%}'.format
+_fmt_ratio = '{:.2f}'.format
+_fmt_ctr = '{:.2f}%'.format
+_fmt_priority = PRIORITY_LABELS.__getitem__
+
+# Report columns as (result key, formatter)
+SUMMARY_COLUMNS = (
+    ('campaign', str), ('spend', _fmt_money), ('sales', _fmt_money),
+    ('acos', _fmt_acos), ('roas', _fmt_ratio), ('clicks', str),
+    ('impressions', str), ('ctr', _fmt_ctr), ('cpc', _fmt_money),
+    ('action', str), ('priority', _fmt_priority), ('reason', str),
+)
+ACTIONS_COLUMNS = (
+    ('priority', _fmt_priority), ('campaign', str), ('action', str), ('acos', _fmt_acos),
+    ('spend', _fmt_money), ('sales', _fmt_money), ('reason', str),
+)
+
+# Characters stripped from currency and number cells
+_CURRENCY_TRANS = str.maketrans('', '', '$,"')
+_NUMBER_TRANS = str.maketrans('', '', ',"')
+
 # Paths
 REPORTS_DIR = Path(__file__).parent / "reports"
 DATA_DIR = Path(__file__).parent.parent / "data" / "ppc"
 
 
-def load_campaign_data(filename: str = "campaigns.csv") -> List[Dict]:
-    """Load campaign data from Amazon CSV export."""
-    filepath = DATA_DIR / filename
-    if not filepath.exists():
-        # Try to auto-find any CSV in the folder
-        csv_files = list(DATA_DIR.glob("*.csv"))
-        if csv_files:
-            filepath = csv_files[0]
-            print(f"   Found: {filepath.name}")
-        else:
-            print(f"⚠️  No campaign data found in {DATA_DIR}")
-            print("   Export from Amazon: Advertising > Campaign Manager > Bulk Operations")
-            return []
-    
-    campaigns = []
+def iter_campaign_data(filepath: Path) -> Iterator[Dict]:
+    """Yield campaign rows, keyed by our field names, from an Amazon CSV export."""
     with open(filepath, 'r', encoding='utf-8-sig') as f:  # utf-8-sig handles BOM
-        reader = csv.DictReader(f)
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if header is None:
+            return
+        
+        # Resolve each field to a cell index once (last duplicate wins, as in DictReader)
+        position = {name: i for i, name in enumerate(header)}
+        indices = [(field, position[column]) for field, column in resolve_columns(header).items()]
+        width = len(header)
         for row in reader:
-            campaigns.append(row)
-    return campaigns
+            if not row:
+                continue
+            if len(row) < width:
+                row += [None] * (width - len(row))
+            yield {field: row[i] for field, i in indices}
 
 
 def parse_currency(value) -> float:
@@ -50,8 +93,8 @@ def parse_currency(value) -> float:
         return 0.0
     if isinstance(value, (int, float)):
         return float(value)
-    # Remove currency symbols and commas
-    cleaned = str(value).replace('$', '').replace(',', '').replace('"', '').strip()
+    # Remove currency symbols and commas in one pass (float() ignores whitespace)
+    cleaned = str(value).translate(_CURRENCY_TRANS)
     try:
         return float(cleaned) if cleaned else 0.0
     except ValueError:
@@ -64,36 +107,56 @@ def parse_number(value) -> float:
         return 0.0
     if isinstance(value, (int, float)):
         return float(value)
-    cleaned = str(value).replace(',', '').replace('"', '').strip()
+    cleaned = str(value).translate(_NUMBER_TRANS)
     try:
         return float(cleaned) if cleaned else 0.0
     except ValueError:
         return 0.0
 
 
-def extract_field(row: Dict, possible_names: List[str]) -> str:
-    """Extract field value trying multiple possible column names."""
-    for name in possible_names:
-        if name in row:
-            return row[name]
-    return ""
+def resolve_columns(fieldnames: List[str]) -> Dict[str, str]:
+    """Map each field to the first of its column aliases present in the header."""
+    columns = {}
+    for field, names in COLUMN_ALIASES.items():
+        for name in names:
+            if name in fieldnames:
+                columns[field] = name
+                break
+    return columns
+
+
+def classify(acos: float, ctr: float) -> Tuple[str, int, str]:
+    """Decide (action, priority, reason) from a campaign's ACOS and CTR."""
+    if acos > PAUSE_THRESHOLD_ACOS:
+        return ('URGENT_REVIEW', HIGH, f'ACOS {acos:.1%}{_URGENT_SUFFIX}')
+    if acos > TARGET_ACOS:
+        return ('REDUCE_BID', MEDIUM, f'ACOS {acos:.1%}{_REDUCE_SUFFIX}')
+    if acos < STRONG_ACOS:
+        return ('INCREASE_BID', HIGH, f'Excellent ACOS {acos:.1%}{_STRONG_SUFFIX}')
+    if acos < GOOD_ACOS:
+        return ('INCREASE_BID', MEDIUM,
+                f'Good ACOS {acos:.1%}. Increase bids slightly to capture more sales.')
+    if ctr < LOW_CTR:
+        return ('REVIEW_CREATIVES', MEDIUM,
+                f'Low CTR {ctr:.2f}%. Review images, titles, and targeting.')
+    return ('HOLD', LOW, f'Performing well (ACOS: {acos:.1%}, CTR: {ctr:.2f}%)')
 
 
 def analyze_campaign(campaign: Dict) -> Optional[Dict]:
     """Analyze a single campaign and return recommendations."""
     try:
-        # Map Amazon's column names to our fields
-        name = extract_field(campaign, ['Campaign name', 'Campaign Name', 'Campaign'])
+        # Fields were mapped from Amazon's column names when the file was read
+        name = campaign.get('name', '')
         if not name:
             return None
             
-        spend = parse_currency(extract_field(campaign, ['Total cost', 'Spend', 'Cost', 'Total Cost']))
-        sales = parse_currency(extract_field(campaign, ['Sales', 'Sales (promoted)', 'Total Sales']))
-        clicks = int(parse_number(extract_field(campaign, ['Clicks', 'Gross clicks', 'Total Clicks'])))
-        impressions = int(parse_number(extract_field(campaign, ['Impressions', 'Total Impressions'])))
+        spend = parse_currency(campaign.get('spend', ''))
+        sales = parse_currency(campaign.get('sales', ''))
+        clicks = int(parse_number(campaign.get('clicks', '')))
+        impressions = int(parse_number(campaign.get('impressions', '')))
         
         # Try to get ROAS directly if available
-        roas_str = extract_field(campaign, ['ROAS', 'ROAS (promoted)'])
+        roas_str = campaign.get('roas', '')
         roas = parse_number(roas_str) if roas_str else 0
         
         # Calculate ACOS
@@ -121,7 +184,7 @@ def analyze_campaign(campaign: Dict) -> Optional[Dict]:
             'ctr': ctr,
             'cpc': cpc,
             'action': 'HOLD',
-            'priority': 'LOW',
+            'priority': LOW,
             'reason': ''
         }
         
@@ -135,28 +198,10 @@ def analyze_campaign(campaign: Dict) -> Optional[Dict]:
             return recommendation
         
         # Decision logic
-        if acos > PAUSE_THRESHOLD_ACOS:
-            recommendation['action'] = 'URGENT_REVIEW'
-            recommendation['priority'] = 'HIGH'
-            recommendation['reason'] = f'ACOS {acos:.1%} is very high (target: {TARGET_ACOS:.1%}). Consider pausing or aggressive bid reduction.'
-        elif acos > TARGET_ACOS:
-            recommendation['action'] = 'REDUCE_BID'
-            recommendation['priority'] = 'MEDIUM'
-            recommendation['reason'] = f'ACOS {acos:.1%} above target {TARGET_ACOS:.1%}. Reduce bids by ~{BID_ADJUSTMENT_DOWN:.0%}.'
-        elif acos < TARGET_ACOS * 0.6:  # Exceptional performance (40% below target)
-            recommendation['action'] = 'INCREASE_BID'
-            recommendation['priority'] = 'HIGH'
-            recommendation['reason'] = f'Excellent ACOS {acos:.1%}! Increase bids by {BID_ADJUSTMENT_UP:.0%} to scale.'
-        elif acos < TARGET_ACOS * 0.85:  # Good performance (15% below target)
-            recommendation['action'] = 'INCREASE_BID'
-            recommendation['priority'] = 'MEDIUM'
-            recommendation['reason'] = f'Good ACOS {acos:.1%}. Increase bids slightly to capture more sales.'
-        elif ctr < 0.2:
-            recommendation['action'] = 'REVIEW_CREATIVES'
-            recommendation['priority'] = 'MEDIUM'
-            recommendation['reason'] = f'Low CTR {ctr:.2f}%. Review images, titles, and targeting.'
-        else:
-            recommendation['reason'] = f'Performing well (ACOS: {acos:.1%}, CTR: {ctr:.2f}%)'
+        action, priority, reason = classify(acos, ctr)
+        recommendation['action'] = action
+        recommendation['priority'] = priority
+        recommendation['reason'] = reason
         
         return recommendation
         
@@ -165,68 +210,53 @@ def analyze_campaign(campaign: Dict) -> Optional[Dict]:
         return None
 
 
-def generate_report(campaigns: List[Dict]) -> None:
-    """Generate analysis report."""
+def write_report(writer, columns: Tuple[Tuple[str, Callable], ...], results: List[Dict]):
+    """Write a header plus one row per result, formatting column by column."""
+    writer.writerow([key for key, _ in columns])
+    writer.writerows(zip(*(
+        map(fmt, map(itemgetter(key), results)) for key, fmt in columns
+    )))
+
+
+def generate_report(campaigns: Iterable[Dict]) -> bool:
+    """Generate analysis report. Returns False if there were no rows at all."""
     today = datetime.now().strftime('%Y-%m-%d')
     REPORTS_DIR.mkdir(parents=True, exist_ok=True)
     
-    # Analyze all campaigns
+    # Analyze rows as they stream in, keeping only the compact results
     results = []
+    rows = 0
+    total_spend = 0.0
+    total_sales = 0.0
     for campaign in campaigns:
+        rows += 1
         result = analyze_campaign(campaign)
         if result:
             results.append(result)
+            total_spend += result['spend']
+            total_sales += result['sales']
+    
+    if not rows:
+        return False
     
     if not results:
         print("⚠️  No campaigns to analyze")
-        return
+        return True
     
-    # Sort by priority and spend
-    priority_order = {'HIGH': 0, 'MEDIUM': 1, 'LOW': 2}
-    results.sort(key=lambda x: (priority_order.get(x['priority'], 3), -x['spend']))
+    # Sort by priority, highest spend first within each (two stable passes)
+    results.sort(key=itemgetter('spend'), reverse=True)
+    results.sort(key=itemgetter('priority'))
     
     # Summary report - all campaigns
     summary_file = REPORTS_DIR / f"{today}_summary.csv"
     with open(summary_file, 'w', newline='', encoding='utf-8') as f:
-        writer = csv.DictWriter(f, fieldnames=[
-            'campaign', 'spend', 'sales', 'acos', 'roas', 'clicks', 'impressions', 
-            'ctr', 'cpc', 'action', 'priority', 'reason'
-        ])
-        writer.writeheader()
-        for r in results:
-            writer.writerow({
-                'campaign': r['campaign'],
-                'spend': f"${r['spend']:.2f}",
-                'sales': f"${r['sales']:.2f}",
-                'acos': f"{r['acos']:.1%}",
-                'roas': f"{r['roas']:.2f}",
-                'clicks': r['clicks'],
-                'impressions': r['impressions'],
-                'ctr': f"{r['ctr']:.2f}%",
-                'cpc': f"${r['cpc']:.2f}",
-                'action': r['action'],
-                'priority': r['priority'],
-                'reason': r['reason']
-            })
+        write_report(csv.writer(f), SUMMARY_COLUMNS, results)
     
     # Actions report - only actionable items
     actions = [r for r in results if r['action'] != 'HOLD']
     actions_file = REPORTS_DIR / f"{today}_actions.csv"
     with open(actions_file, 'w', newline='', encoding='utf-8') as f:
-        writer = csv.DictWriter(f, fieldnames=[
-            'priority', 'campaign', 'action', 'acos', 'spend', 'sales', 'reason'
-        ])
-        writer.writeheader()
-        for r in actions:
-            writer.writerow({
-                'priority': r['priority'],
-                'campaign': r['campaign'],
-                'action': r['action'],
-                'acos': f"{r['acos']:.1%}",
-                'spend': f"${r['spend']:.2f}",
-                'sales': f"${r['sales']:.2f}",
-                'reason': r['reason']
-            })
+        write_report(csv.writer(f), ACTIONS_COLUMNS, actions)
     
     # Print summary to console
     print(f"\n📊 PPC Analysis Complete - {today}")
@@ -234,8 +264,6 @@ def generate_report(campaigns: List[Dict]) -> None:
     print(f"   Campaigns analyzed: {len(results)}")
     print(f"   Actions needed: {len(actions)}")
     
-    total_spend = sum(r['spend'] for r in results)
-    total_sales = sum(r['sales'] for r in results)
     overall_acos = total_spend / total_sales if total_sales > 0 else 0
     
     print(f"\n   Total Spend: ${total_spend:,.2f}")
@@ -252,7 +280,7 @@ def generate_report(campaigns: List[Dict]) -> None:
         print(f"\n🎯 Recommended Actions (by priority):")
         print("-" * 60)
         for a in actions[:15]:  # Show top 15
-            print(f"\n   [{a['priority']}] {a['action']}")
+            print(f"\n   [{PRIORITY_LABELS[a['priority']]}] {a['action']}")
             print(f"   Campaign: {a['campaign']}")
             print(f"   ACOS: {a['acos']:.1%} | Spend: ${a['spend']:.2f}")
             print(f"   └─ {a['reason']}")
@@ -261,6 +289,8 @@ def generate_report(campaigns: List[Dict]) -> None:
             print(f"\n   ... and {len(actions) - 15} more actions")
     else:
         print("\n✅ All campaigns performing within target ACOS!")
+    
+    return True
 
 
 def main():
@@ -283,10 +313,7 @@ def main():
     # Process all CSV files found
     for csv_file in csv_files:
         print(f"\n📁 Processing: {csv_file.name}")
-        campaigns = load_campaign_data(csv_file.name)
-        if campaigns:
-            generate_report(campaigns)
-        else:
+        if not generate_report(iter_campaign_data(csv_file)):
             print(f"   No data in {csv_file.name}")
 
 
@@ -5,7 +5,10 @@ Identifies repeat customers and generates personalized review request emails.
 
 import csv
 from datetime import datetime, timedelta
+from functools import lru_cache
+from itertools import chain
 from pathlib import Path
+from sys import intern
 from typing import Dict, List, Set, Optional
 
 # Configuration
@@ -14,6 +17,15 @@ MIN_DAYS_SINCE_ORDER = 7  # Wait at least 7 days
 MAX_DAYS_SINCE_ORDER = 30  # Don't go beyond 30 days
 TRACKING_FILE = Path(__file__).parent / "data" / "contacted_customers.csv"
 
+# Order export columns the generator actually reads
+ORDER_COLUMNS = (
+    'Order ID', 'Purchase Date', 'Order Date', 'Buyer Email', 'Buyer Name',
+    'Product Name', 'Item Price', 'Order Status'
+)
+
+# Order date formats seen in Amazon exports (2024-01-15, 01/15/2024, etc.)
+DATE_FORMATS = ('%Y-%m-%d', '%m/%d/%Y', '%m/%d/%y', '%Y-%m-%d %H:%M:%S')
+
 # Paths
 OUTPUT_DIR = Path(__file__).parent / "output"
 DATA_DIR = Path(__file__).parent.parent / "data" / "orders"
@@ -47,39 +59,58 @@ def load_orders(filename: str = "orders.csv") -> List[Dict]:
         print("   Export from Amazon: Orders > Order Reports > Request Report")
         return []
     
-    orders = []
     with open(filepath, 'r', encoding='utf-8') as f:
         reader = csv.DictReader(f)
-        for row in reader:
-            orders.append(row)
+        # Keep only the columns we use, so wide exports don't sit in memory
+        columns = [c for c in ORDER_COLUMNS if c in (reader.fieldnames or [])]
+        orders = [{c: row[c] for c in columns} for row in reader]
+    
+    # Normalize emails once here so grouping and set lookups never re-lowercase
+    if 'Buyer Email' in columns:
+        for order in orders:
+            order['Buyer Email'] = intern((order['Buyer Email'] or '').lower())
     return orders
 
 
+# Format that parsed the previous date; an export almost always uses just one
+_last_date_fmt = DATE_FORMATS[0]
+
+
+@lru_cache(maxsize=4096)
 def parse_order_date(date_str: str) -> Optional[datetime]:
     """Parse Amazon order date format."""
-    try:
-        # Common formats: 2024-01-15, 01/15/2024, etc.
-        for fmt in ['%Y-%m-%d', '%m/%d/%Y', '%m/%d/%y', '%Y-%m-%d %H:%M:%S']:
-            try:
-                return datetime.strptime(date_str.strip(), fmt)
-            except ValueError:
-                continue
-    except:
-        pass
+    global _last_date_fmt
+    if not date_str:
+        return None
+    
+    date_str = date_str.strip()
+    last = _last_date_fmt
+    for fmt in chain((last,), (f for f in DATE_FORMATS if f != last)):
+        try:
+            parsed = datetime.strptime(date_str, fmt)
+        except ValueError:
+            continue
+        _last_date_fmt = fmt
+        return parsed
     return None
 
 
+def parse_price(value) -> float:
+    """Parse an item price, treating blanks and junk as 0."""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return 0.0
+
+
 def get_contacted_customers() -> Set[str]:
     """Get list of customers already contacted."""
     if not TRACKING_FILE.exists():
         return set()
     
-    contacted = set()
     with open(TRACKING_FILE, 'r', encoding='utf-8') as f:
         reader = csv.DictReader(f)
-        for row in reader:
-            contacted.add(row.get('email', '').lower())
-    return contacted
+        return {intern(row.get('email', '').lower()) for row in reader}
 
 
 def identify_repeat_customers(orders: List[Dict]) -> Dict[str, Dict]:
@@ -87,15 +118,18 @@ def identify_repeat_customers(orders: List[Dict]) -> Dict[str, Dict]:
     customers = {}
     
     for order in orders:
-        email = order.get('Buyer Email', '').lower()
+        email = order.get('Buyer Email', '')  # lowercased by load_orders
         if not email:
             continue
         
-        if email not in customers:
-            customers[email] = {
+        customer = customers.get(email)
+        if customer is None:
+            customer = customers[email] = {
                 'email': email,
                 'name': order.get('Buyer Name', 'Valued Customer'),
-                'orders': [],
+                'order_count': 0,
+                'latest_order': None,
+                'latest_date': None,
                 'total_spent': 0
             }
         
@@ -103,29 +137,33 @@ def identify_repeat_customers(orders: List[Dict]) -> Dict[str, Dict]:
         date_str = order.get('Purchase Date', order.get('Order Date', ''))
         order_date = parse_order_date(date_str)
         
-        customers[email]['orders'].append({
-            'order_id': order.get('Order ID', ''),
-            'date': order_date,
-            'product': order.get('Product Name', 'Unknown Product'),
-            'amount': float(order.get('Item Price', 0)),
-            'status': order.get('Order Status', 'Unknown')
-        })
+        amount = parse_price(order.get('Item Price', 0))
         
-        try:
-            customers[email]['total_spent'] += float(order.get('Item Price', 0))
-        except:
-            pass
+        # Track the most recent order as we go (first one wins on ties)
+        customer['order_count'] += 1
+        customer['total_spent'] += amount
+        sort_date = order_date or datetime.min
+        if customer['latest_order'] is None or sort_date > customer['latest_date']:
+            customer['latest_order'] = {
+                'order_id': order.get('Order ID', ''),
+                'date': order_date,
+                'product': order.get('Product Name', 'Unknown Product'),
+                'amount': amount,
+                'status': order.get('Order Status', 'Unknown')
+            }
+            customer['latest_date'] = sort_date
     
     # Filter for repeat customers
     repeat_customers = {}
     for email, data in customers.items():
-        if len(data['orders']) >= MIN_PURCHASES:
+        if data['order_count'] >= MIN_PURCHASES:
             repeat_customers[email] = data
     
     return repeat_customers
 
 
-def is_eligible_for_review(customer: Dict, contacted: Set[str]) -> Optional[Dict]:
+def is_eligible_for_review(customer: Dict, contacted: Set[str],
+                           now: Optional[datetime] = None) -> Optional[Dict]:
     """Check if customer is eligible for review request."""
     email = customer['email']
     
@@ -133,16 +171,15 @@ def is_eligible_for_review(customer: Dict, contacted: Set[str]) -> Optional[Dict
     if email in contacted:
         return None
     
-    # Get most recent order
-    orders = sorted(customer['orders'], key=lambda x: x['date'] or datetime.min, reverse=True)
-    latest_order = orders[0]
+    # Most recent order (tracked while grouping)
+    latest_order = customer['latest_order']
     
     # Must have a valid date
     if not latest_order['date']:
         return None
     
     # Check date range
-    days_ago = (datetime.now() - latest_order['date']).days
+    days_ago = ((now or datetime.now()) - latest_order['date']).days
     if days_ago < MIN_DAYS_SINCE_ORDER or days_ago > MAX_DAYS_SINCE_ORDER:
         return None
     
@@ -155,35 +192,40 @@ def is_eligible_for_review(customer: Dict, contacted: Set[str]) -> Optional[Dict
         'email': email,
         'name': customer['name'],
         'first_name': customer['name'].split()[0] if customer['name'] else 'Friend',
-        'order_count': len(orders),
+        'order_count': customer['order_count'],
         'total_spent': customer['total_spent'],
         'latest_order': latest_order,
         'days_since_order': days_ago
     }
 
 
+@lru_cache(maxsize=1024)
+def short_product_name(product: str) -> str:
+    """Extract short product name (first 3-4 words)."""
+    return ' '.join(product.split()[:4])
+
+
 def generate_email(customer: Dict) -> str:
     """Generate personalized email."""
-    product = customer['latest_order']['product']
-    # Extract short product name (first 3-4 words)
-    short_product = ' '.join(product.split()[:4])
-    
     return EMAIL_TEMPLATE.format(
         first_name=customer['first_name'],
-        product_name=short_product,
+        product_name=short_product_name(customer['latest_order']['product']),
         order_count=customer['order_count']
     )
 
 
-def generate_reports(eligible: List[Dict]) -> None:
+def generate_reports(eligible: List[Dict], now: Optional[datetime] = None) -> None:
     """Generate output reports."""
-    today = datetime.now().strftime('%Y-%m-%d')
+    today = (now or datetime.now()).strftime('%Y-%m-%d')
     OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
     
     if not eligible:
         print("   No eligible customers found today.")
         return
     
+    # Render each email once; both reports share the same draft
+    drafts = [generate_email(c) for c in eligible]
+    
     # CSV list for Mailchimp/upload
     csv_file = OUTPUT_DIR / f"{today}_review_requests.csv"
     with open(csv_file, 'w', newline='', encoding='utf-8') as f:
@@ -192,7 +234,7 @@ def generate_reports(eligible: List[Dict]) -> None:
             'Latest Product', 'Days Since Order', 'Email Draft'
         ])
         writer.writeheader()
-        for c in eligible:
+        for c, draft in zip(eligible, drafts):
             writer.writerow({
                 'Email': c['email'],
                 'First Name': c['first_name'],
@@ -200,7 +242,7 @@ def generate_reports(eligible: List[Dict]) -> None:
                 'Total Spent': f"${c['total_spent']:.2f}",
                 'Latest Product': c['latest_order']['product'],
                 'Days Since Order': c['days_since_order'],
-                'Email Draft': generate_email(c).replace('\n', ' | ')
+                'Email Draft': draft.replace('\n', ' | ')
             })
     
     # Text file with ready-to-send emails
@@ -209,11 +251,11 @@ def generate_reports(eligible: List[Dict]) -> None:
         f.write(f"Review Request Email Drafts - {today}\n")
         f.write("=" * 60 + "\n\n")
         
-        for c in eligible:
+        for c, draft in zip(eligible, drafts):
             f.write(f"To: {c['email']}\n")
             f.write(f"Customer: {c['name']} ({c['order_count']} orders, ${c['total_spent']:.2f})\n")
             f.write("-" * 60 + "\n")
-            f.write(generate_email(c))
+            f.write(draft)
             f.write("\n" + "=" * 60 + "\n\n")
     
     print(f"\n📧 Generated {len(eligible)} review requests")
@@ -246,17 +288,18 @@ def main():
     repeat = identify_repeat_customers(orders)
     print(f"   Repeat customers: {len(repeat)}")
     
-    # Find eligible ones
+    # Find eligible ones (one clock reading for the whole run)
+    now = datetime.now()
     eligible = []
     for email, customer in repeat.items():
-        result = is_eligible_for_review(customer, contacted)
+        result = is_eligible_for_review(customer, contacted, now)
         if result:
             eligible.append(result)
     
     print(f"   Eligible for review request: {len(eligible)}")
     
     # Generate reports
-    generate_reports(eligible)
+    generate_reports(eligible, now)
     
     if eligible:
         print("\n✅ Next steps:")